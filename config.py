@@ -1,6 +1,8 @@
 from dotenv import load_dotenv
 import os
 import json
+import pickle
+import time
 
 # Load environment variables
 load_dotenv()
@@ -48,26 +50,44 @@ DEFAULT_BOT_CONFIG = {
     'log_file': 'trading_bot.log'
 }
 
+# Process-wide logging settings
+LOG_LEVEL = os.getenv('LOG_LEVEL', DEFAULT_BOT_CONFIG['log_level'])
+LOG_FILE = os.getenv('LOG_FILE', DEFAULT_BOT_CONFIG['log_file'])
+
+# Name of the bot shown on the dashboard; the most recently started bot when unset
+DASHBOARD_BOT = os.getenv('DASHBOARD_BOT')
+
+# Pickled template; unpickling gives an independent copy faster than copy.deepcopy
+_DEFAULT_BLOB = pickle.dumps(DEFAULT_BOT_CONFIG, protocol=5)
+
+# In-process cache of bot configs loaded from the database: bot_id -> (loaded_at, pickled config)
+_CONFIG_CACHE = {}
+_CONFIG_TTL = 30.0  # seconds
+
 def load_bot_config(bot_id=None):
     """Load configuration for a specific bot or return default config"""
     if bot_id:
+        cached = _CONFIG_CACHE.get(bot_id)
+        if cached and time.monotonic() - cached[0] < _CONFIG_TTL:
+            return pickle.loads(cached[1])
+
         from database import Database
         db = Database()
         config = db.get_bot(bot_id)
-        db.close()
         if config:
+            _CONFIG_CACHE[bot_id] = (time.monotonic(), pickle.dumps(config, protocol=5))
             return config
     
-    return DEFAULT_BOT_CONFIG.copy()
+    return pickle.loads(_DEFAULT_BLOB)
 
 def save_bot_config(bot_config):
     """Save bot configuration to database"""
     from database import Database
     db = Database()
+    _CONFIG_CACHE.pop(bot_config.get('_id'), None)
     if '_id' in bot_config:
         db.update_bot(bot_config['_id'], bot_config)
     else:
         bot_id = db.create_bot(bot_config)
         bot_config['_id'] = bot_id
-    db.close()
     return bot_config 
\ No newline at end of file
@@ -1,32 +1,192 @@
-from pymongo import MongoClient
-from motor.motor_asyncio import AsyncIOMotorClient
-import os
-from datetime import datetime
+from bson import ObjectId
+from pymongo import MongoClient, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+from pymongo.write_concern import WriteConcern
+import asyncio
+import atexit
+import functools
+import logging
+from datetime import datetime, timezone
 import config
 
+# Pool settings shared by the sync and async clients
+_POOL_OPTIONS = {
+    'maxPoolSize': 100,
+    'minPoolSize': 5,
+    'maxIdleTimeMS': 300000,
+    'waitQueueTimeoutMS': 10000
+}
+
+@functools.lru_cache(maxsize=1)
+def get_sync_client():
+    """Return the process-wide MongoClient, creating it on first use"""
+    return MongoClient(config.MONGO_URI, **_POOL_OPTIONS)
+
+@functools.lru_cache(maxsize=1)
+def get_async_client():
+    """Return the process-wide Motor client, creating it on first use
+
+    Motor binds the client to the event loop it is first used on, so a process
+    should drive all AsyncDatabase instances from a single loop.
+    """
+    from motor.motor_asyncio import AsyncIOMotorClient
+    return AsyncIOMotorClient(config.MONGO_URI, **_POOL_OPTIONS)
+
+def _close_clients():
+    """Close whichever shared clients were created"""
+    if get_sync_client.cache_info().currsize:
+        get_sync_client().close()
+    if get_async_client.cache_info().currsize:
+        get_async_client().close()
+
+atexit.register(_close_clients)
+
+# Write durability per collection. Market data snapshots can always be
+# refetched from the exchange, so they are written unacknowledged (w=0): the
+# driver does not wait for the server, and a failed write is silently lost.
+# Trades cannot be reconstructed, so they wait for the primary's
+# acknowledgement, but not for the journal flush (j=False); a write can still
+# be lost if the server crashes before its next journal commit.
+_MARKET_DATA_WRITE_CONCERN = WriteConcern(w=0)
+_TRADES_WRITE_CONCERN = WriteConcern(w=1, j=False)
+
+# Raw market data snapshots are purged by MongoDB after this many seconds
+MARKET_DATA_TTL = 7 * 86400
+
+# Server error code for an insert whose _id is already stored
+_DUPLICATE_KEY = 11000
+
+# Newest first. Documents flushed in one batch share a timestamp, so _id
+# (generated client-side in insertion order) breaks the tie deterministically
+_NEWEST_FIRST = [('timestamp', -1), ('_id', -1)]
+
+# Every launch stores fresh bot documents, so the newest one is the bot still running
+_NEWEST_BOT_FIRST = [('created_at', -1), ('_id', -1)]
+
+@functools.lru_cache(maxsize=1)
+def _ensure_indexes():
+    """Create the indexes behind the per-bot queries, once per process"""
+    db = get_sync_client()['trading_bots']
+    for name in ('trades', 'market_data', 'performance'):
+        db[name].create_index([('bot_id', 1), ('timestamp', -1), ('_id', -1)])
+    db['market_data'].create_index('timestamp', expireAfterSeconds=MARKET_DATA_TTL)
+    db['stats'].create_index('bot_id', unique=True)
+    # Only open records of positions still open carry the flag, so the index stays as small as the open set
+    db['trades'].create_index([('bot_id', 1), ('_id', 1)], partialFilterExpression={'open': True})
+
+def _stats_updates(trades):
+    """$inc upserts folding a batch of trade documents into the per-bot stats counters"""
+    totals = {}
+    for trade in trades:
+        counters = totals.setdefault(trade['bot_id'], [0, 0, 0.0])
+        pnl = float(trade.get('pnl', 0))
+        counters[0] += 1
+        counters[1] += pnl > 0
+        counters[2] += pnl
+    return [
+        UpdateOne(
+            {'bot_id': bot_id},
+            {'$inc': {'total_trades': total, 'winning_trades': wins, 'total_pnl': pnl}},
+            upsert=True
+        )
+        for bot_id, (total, wins, pnl) in totals.items()
+    ]
+
+def _trade_summary_pipeline(bot_id):
+    """Aggregation computing a bot's stats counters from its full trade history"""
+    return [
+        {'$match': {'bot_id': bot_id}},
+        {'$group': {
+            '_id': None,
+            'total_trades': {'$sum': 1},
+            'winning_trades': {'$sum': {'$cond': [{'$gt': ['$pnl', 0]}, 1, 0]}},
+            'total_pnl': {'$sum': '$pnl'}
+        }}
+    ]
+
+def _stats_seed(bot_id, summary):
+    """Filter and update replacing a bot's unseeded stats counters with its full trade summary
+
+    Counters written by $inc before seeding only cover part of the history, so
+    they are overwritten; a document that is already seeded is left alone.
+    """
+    counters = {key: summary[key] for key in ('total_trades', 'winning_trades', 'total_pnl')}
+    return {'bot_id': bot_id, 'seeded': {'$ne': True}}, {'$set': {**counters, 'seeded': True}}
+
+def _close_updates(trades):
+    """Updates clearing the open flag of the open record matching each close record in a batch"""
+    return [
+        UpdateOne(
+            # The open and close records of one position carry the same trade timestamp and entry price
+            {'bot_id': trade['bot_id'], 'open': True,
+             'trade.timestamp': trade['trade']['timestamp'],
+             'trade.entry_price': trade['trade']['entry_price']},
+            {'$unset': {'open': ''}}
+        )
+        for trade in trades if trade.get('type') == 'close'
+    ]
+
+def _statistics(stats, latest_performance):
+    """Shape the stats counters and latest performance sample into get_bot_statistics' result"""
+    total_trades = stats['total_trades']
+    winning_trades = stats['winning_trades']
+    win_rate = (winning_trades / total_trades) * 100 if total_trades > 0 else 0
+
+    return {
+        'total_trades': total_trades,
+        'winning_trades': winning_trades,
+        'losing_trades': total_trades - winning_trades,
+        'total_pnl': stats['total_pnl'],
+        'win_rate': win_rate,
+        'current_balance': latest_performance.get('balance', 0) if latest_performance else 0,
+        'max_drawdown': latest_performance.get('max_drawdown', 0) if latest_performance else 0
+    }
+
+_OHLCV_COLUMNS = ['open', 'high', 'low', 'close', 'volume']
+
+def pack_ohlcv(df):
+    """Columnar binary payload for an OHLCV frame, stored instead of one dict per candle"""
+    import numpy as np
+    ohlcv = df[_OHLCV_COLUMNS].to_numpy(dtype=np.float32)
+    return {
+        'timestamps': df['timestamp'].to_numpy(dtype='datetime64[ms]').view(np.int64).tobytes(),
+        'ohlcv': ohlcv.tobytes(),
+        'shape': list(ohlcv.shape)
+    }
+
+def unpack_ohlcv(doc):
+    """Rebuild the OHLCV frame from a payload written by pack_ohlcv"""
+    import numpy as np
+    import pandas as pd
+    ohlcv = np.frombuffer(doc['ohlcv'], dtype=np.float32).reshape(doc['shape'])
+    frame = pd.DataFrame(ohlcv.astype(np.float64), columns=_OHLCV_COLUMNS)
+    frame.insert(0, 'timestamp', pd.to_datetime(np.frombuffer(doc['timestamps'], dtype=np.int64), unit='ms'))
+    return frame
+
 class Database:
     def __init__(self):
-        # MongoDB connection string from environment variable or default
-        self.mongo_uri = os.getenv('MONGO_URI', 'mongodb://localhost:27017')
-        self.client = MongoClient(self.mongo_uri)
+        self.client = get_sync_client()
         self.db = self.client['trading_bots']
         
         # Collections
         self.bots = self.db['bots']
-        self.trades = self.db['trades']
-        self.market_data = self.db['market_data']
+        self.trades = self.db.get_collection('trades', write_concern=_TRADES_WRITE_CONCERN)
+        self.market_data = self.db.get_collection('market_data', write_concern=_MARKET_DATA_WRITE_CONCERN)
         self.performance = self.db['performance']
+        self.stats = self.db['stats']
+        _ensure_indexes()
 
     def create_bot(self, bot_config):
         """Create a new bot configuration"""
-        bot_config['created_at'] = datetime.now()
-        bot_config['updated_at'] = datetime.now()
+        now = datetime.now(timezone.utc)
+        bot_config['created_at'] = now
+        bot_config['updated_at'] = now
         result = self.bots.insert_one(bot_config)
         return result.inserted_id
 
     def update_bot(self, bot_id, update_data):
         """Update bot configuration"""
-        update_data['updated_at'] = datetime.now()
+        update_data['updated_at'] = datetime.now(timezone.utc)
         self.bots.update_one({'_id': bot_id}, {'$set': update_data})
 
     def get_bot(self, bot_id):
@@ -37,73 +197,300 @@ class Database:
         """Get all bot configurations"""
         return list(self.bots.find())
 
+    def get_latest_bot(self, name=None):
+        """Most recently created bot configuration, optionally matching a name, or None"""
+        query = {'name': name} if name else {}
+        return self.bots.find_one(query, sort=_NEWEST_BOT_FIRST)
+
     def record_trade(self, bot_id, trade_data):
         """Record a trade"""
         trade_data['bot_id'] = bot_id
-        trade_data['timestamp'] = datetime.now()
+        trade_data['timestamp'] = datetime.now(timezone.utc)
         self.trades.insert_one(trade_data)
+        self.stats.bulk_write(_stats_updates([trade_data]))
+        closes = _close_updates([trade_data])
+        if closes:
+            self.trades.bulk_write(closes)
+
+    def get_bot_trades(self, bot_id, limit=100, projection=None):
+        """Get recent trades for a bot; projection limits the fields sent over the wire"""
+        return list(self.trades.find({'bot_id': bot_id}, projection)
+                   .sort(_NEWEST_FIRST)
+                   .limit(limit)
+                   .batch_size(limit))
 
-    def get_bot_trades(self, bot_id, limit=100):
-        """Get recent trades for a bot"""
-        return list(self.trades.find({'bot_id': bot_id})
-                   .sort('timestamp', -1)
-                   .limit(limit))
+    def get_open_trades(self, bot_id):
+        """Trades a bot has opened and not yet closed, oldest first"""
+        cursor = self.trades.find({'bot_id': bot_id, 'open': True}, {'trade': 1}).sort('_id', 1)
+        return [doc['trade'] for doc in cursor]
 
     def record_market_data(self, bot_id, market_data):
         """Record market data"""
         market_data['bot_id'] = bot_id
-        market_data['timestamp'] = datetime.now()
+        market_data['timestamp'] = datetime.now(timezone.utc)
         self.market_data.insert_one(market_data)
 
-    def get_market_data(self, bot_id, limit=100):
-        """Get recent market data for a bot"""
-        return list(self.market_data.find({'bot_id': bot_id})
-                   .sort('timestamp', -1)
-                   .limit(limit))
+    def get_market_data(self, bot_id, limit=100, projection=None):
+        """Get recent market data for a bot; projection limits the fields sent over the wire"""
+        return list(self.market_data.find({'bot_id': bot_id}, projection)
+                   .sort(_NEWEST_FIRST)
+                   .limit(limit)
+                   .batch_size(limit))
+
+    def get_latest_market_data(self, bot_id):
+        """Most recently stored OHLCV frame for a bot, or None"""
+        doc = self.market_data.find_one({'bot_id': bot_id}, sort=_NEWEST_FIRST)
+        return unpack_ohlcv(doc) if doc else None
 
     def record_performance(self, bot_id, performance_data):
         """Record performance metrics"""
         performance_data['bot_id'] = bot_id
-        performance_data['timestamp'] = datetime.now()
+        performance_data['timestamp'] = datetime.now(timezone.utc)
         self.performance.insert_one(performance_data)
 
-    def get_bot_performance(self, bot_id, limit=100):
-        """Get performance metrics for a bot"""
-        return list(self.performance.find({'bot_id': bot_id})
-                   .sort('timestamp', -1)
-                   .limit(limit))
+    def get_bot_performance(self, bot_id, limit=100, projection=None):
+        """Get performance metrics for a bot; projection limits the fields sent over the wire"""
+        return list(self.performance.find({'bot_id': bot_id}, projection)
+                   .sort(_NEWEST_FIRST)
+                   .limit(limit)
+                   .batch_size(limit))
 
     def get_bot_statistics(self, bot_id):
         """Get aggregated statistics for a bot"""
-        # Get all trades for the bot
-        trades = list(self.trades.find({'bot_id': bot_id}))
-        
-        if not trades:
-            return None
+        # Counters are maintained incrementally as trades are recorded
+        stats = self.stats.find_one({'bot_id': bot_id, 'seeded': True})
 
-        # Calculate statistics
-        total_trades = len(trades)
-        winning_trades = len([t for t in trades if t.get('pnl', 0) > 0])
-        losing_trades = total_trades - winning_trades
-        total_pnl = sum(t.get('pnl', 0) for t in trades)
-        win_rate = (winning_trades / total_trades) * 100 if total_trades > 0 else 0
+        if not stats:
+            # Seed once from the full history; trades recorded before the counters existed are included
+            summary = list(self.trades.aggregate(_trade_summary_pipeline(bot_id)))
+            if not summary:
+                return None
+            stats = summary[0]
+            try:
+                self.stats.update_one(*_stats_seed(bot_id, stats), upsert=True)
+            except DuplicateKeyError:
+                pass  # seeded concurrently
 
         # Get latest performance metrics
         latest_performance = self.performance.find_one(
             {'bot_id': bot_id},
-            sort=[('timestamp', -1)]
+            sort=_NEWEST_FIRST
+        )
+
+        return _statistics(stats, latest_performance)
+
+class AsyncDatabase:
+    """Motor-backed counterpart of Database for use inside an asyncio event loop
+
+    Trades, market data and performance samples are buffered in memory and
+    written with insert_many once a buffer reaches batch_size documents, or
+    every flush_interval seconds for low-rate bots. Call aclose() before
+    shutting down to persist whatever is still buffered.
+    """
+
+    def __init__(self, batch_size=500, flush_interval=2.0):
+        self.client = get_async_client()
+        self.db = self.client['trading_bots']
+
+        # Collections
+        self.bots = self.db['bots']
+        self.trades = self.db.get_collection('trades', write_concern=_TRADES_WRITE_CONCERN)
+        self.market_data = self.db.get_collection('market_data', write_concern=_MARKET_DATA_WRITE_CONCERN)
+        self.performance = self.db['performance']
+        self.stats = self.db['stats']
+
+        # Write buffers
+        self._trade_buf = []
+        self._market_buf = []
+        self._perf_buf = []
+        self._batch_size = batch_size
+        self._flush_interval = flush_interval
+        self._flush_task = None
+        self._flush_lock = None  # created on first flush, inside the running loop
+        _ensure_indexes()
+
+    async def create_bot(self, bot_config):
+        """Create a new bot configuration"""
+        now = datetime.now(timezone.utc)
+        bot_config['created_at'] = now
+        bot_config['updated_at'] = now
+        result = await self.bots.insert_one(bot_config)
+        return result.inserted_id
+
+    async def update_bot(self, bot_id, update_data):
+        """Update bot configuration"""
+        update_data['updated_at'] = datetime.now(timezone.utc)
+        await self.bots.update_one({'_id': bot_id}, {'$set': update_data})
+
+    async def get_bot(self, bot_id):
+        """Get bot configuration"""
+        return await self.bots.find_one({'_id': bot_id})
+
+    async def get_all_bots(self):
+        """Get all bot configurations"""
+        return await self.bots.find().to_list(None)
+
+    async def get_latest_bot(self, name=None):
+        """Most recently created bot configuration, optionally matching a name, or None"""
+        query = {'name': name} if name else {}
+        return await self.bots.find_one(query, sort=_NEWEST_BOT_FIRST)
+
+    async def _buffer_write(self, buf, flush, bot_id, doc):
+        """Queue a document and flush its buffer once it reaches batch_size; never raises on a failed flush"""
+        # The _id is fixed here so a retried flush cannot insert the same document twice
+        buf.append({**doc, '_id': ObjectId(), 'bot_id': bot_id})
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.get_running_loop().create_task(self._flush_periodically())
+        # Tried again at every further batch_size documents while the database is failing,
+        # so an outage costs one failed write per batch rather than one per record
+        if len(buf) % self._batch_size == 0:
+            try:
+                await flush()
+            except Exception as e:
+                # The caller's state has already moved on; the documents stay buffered for the next flush
+                logging.error("Error flushing database buffer, %d documents pending: %s", len(buf), e)
+
+    async def _flush_buffer(self, collection, buf):
+        """Write out and empty a single buffer, returning the documents written
+
+        Documents leave the buffer only once insert_many succeeds, so a failed
+        write is retried on the next flush instead of being dropped. Documents
+        an earlier attempt already stored are rejected by their _id and count
+        as written.
+        """
+        if self._flush_lock is None:
+            self._flush_lock = asyncio.Lock()
+        # One flush at a time, so the periodic and size-triggered flushes never write the same documents
+        async with self._flush_lock:
+            if not buf:
+                return []
+            count = len(buf)
+            # One UTC timestamp per batch; MongoDB stores datetimes as UTC natively
+            now = datetime.now(timezone.utc)
+            docs = buf[:count]
+            for doc in docs:
+                doc.setdefault('timestamp', now)
+            try:
+                await collection.insert_many(docs, ordered=False)
+            except BulkWriteError as e:
+                details = e.details
+                if details.get('writeConcernErrors') or any(
+                        error['code'] != _DUPLICATE_KEY for error in details['writeErrors']):
+                    raise
+            # Documents queued while the write was in flight stay buffered
+            del buf[:count]
+            return docs
+
+    async def _flush_trades(self):
+        """Write buffered trades, fold them into the per-bot stats counters and clear closed positions' open flags"""
+        docs = await self._flush_buffer(self.trades, self._trade_buf)
+        if docs:
+            await self.stats.bulk_write(_stats_updates(docs), ordered=False)
+            closes = _close_updates(docs)
+            if closes:
+                await self.trades.bulk_write(closes, ordered=False)
+
+    async def _flush_market_data(self):
+        """Write buffered market data"""
+        await self._flush_buffer(self.market_data, self._market_buf)
+
+    async def _flush_performance(self):
+        """Write buffered performance samples"""
+        await self._flush_buffer(self.performance, self._perf_buf)
+
+    async def _flush_periodically(self):
+        """Background task that flushes buffers for bots writing below batch_size"""
+        while True:
+            await asyncio.sleep(self._flush_interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                pending = len(self._trade_buf) + len(self._market_buf) + len(self._perf_buf)
+                logging.error("Error flushing database buffers, %d documents pending: %s", pending, e)
+
+    async def flush(self):
+        """Write all buffered documents"""
+        await self._flush_trades()
+        await self._flush_market_data()
+        await self._flush_performance()
+
+    async def record_trade(self, bot_id, trade_data):
+        """Record a trade"""
+        await self._buffer_write(self._trade_buf, self._flush_trades, bot_id, trade_data)
+
+    async def get_bot_trades(self, bot_id, limit=100, projection=None):
+        """Get recent trades for a bot; projection limits the fields sent over the wire"""
+        cursor = (self.trades.find({'bot_id': bot_id}, projection)
+                  .sort(_NEWEST_FIRST)
+                  .limit(limit)
+                  .batch_size(limit))
+        return await cursor.to_list(limit)
+
+    async def get_open_trades(self, bot_id):
+        """Trades a bot has opened and not yet closed, oldest first"""
+        cursor = self.trades.find({'bot_id': bot_id, 'open': True}, {'trade': 1}).sort('_id', 1)
+        return [doc['trade'] async for doc in cursor]
+
+    async def record_market_data(self, bot_id, market_data):
+        """Record market data"""
+        await self._buffer_write(self._market_buf, self._flush_market_data, bot_id, market_data)
+
+    async def get_market_data(self, bot_id, limit=100, projection=None):
+        """Get recent market data for a bot; projection limits the fields sent over the wire"""
+        cursor = (self.market_data.find({'bot_id': bot_id}, projection)
+                  .sort(_NEWEST_FIRST)
+                  .limit(limit)
+                  .batch_size(limit))
+        return await cursor.to_list(limit)
+
+    async def get_latest_market_data(self, bot_id):
+        """Most recently stored OHLCV frame for a bot, or None"""
+        doc = await self.market_data.find_one({'bot_id': bot_id}, sort=_NEWEST_FIRST)
+        return unpack_ohlcv(doc) if doc else None
+
+    async def record_performance(self, bot_id, performance_data):
+        """Record performance metrics"""
+        await self._buffer_write(self._perf_buf, self._flush_performance, bot_id, performance_data)
+
+    async def get_bot_performance(self, bot_id, limit=100, projection=None):
+        """Get performance metrics for a bot; projection limits the fields sent over the wire"""
+        cursor = (self.performance.find({'bot_id': bot_id}, projection)
+                  .sort(_NEWEST_FIRST)
+                  .limit(limit)
+                  .batch_size(limit))
+        return await cursor.to_list(limit)
+
+    async def get_bot_statistics(self, bot_id):
+        """Get aggregated statistics for a bot"""
+        # Counters are maintained incrementally as trades are recorded
+        stats = await self.stats.find_one({'bot_id': bot_id, 'seeded': True})
+
+        if not stats:
+            # Seed once from the full history; trades recorded before the counters existed are included
+            summary = await self.trades.aggregate(_trade_summary_pipeline(bot_id)).to_list(1)
+            if not summary:
+                return None
+            stats = summary[0]
+            try:
+                await self.stats.update_one(*_stats_seed(bot_id, stats), upsert=True)
+            except DuplicateKeyError:
+                pass  # seeded concurrently
+
+        # Get latest performance metrics
+        latest_performance = await self.performance.find_one(
+            {'bot_id': bot_id},
+            sort=_NEWEST_FIRST
         )
 
-        return {
-            'total_trades': total_trades,
-            'winning_trades': winning_trades,
-            'losing_trades': losing_trades,
-            'total_pnl': total_pnl,
-            'win_rate': win_rate,
-            'current_balance': latest_performance.get('balance', 0) if latest_performance else 0,
-            'max_drawdown': latest_performance.get('max_drawdown', 0) if latest_performance else 0
-        }
-
-    def close(self):
-        """Close database connection"""
-        self.client.close() 
\ No newline at end of file
+        return _statistics(stats, latest_performance)
+
+    async def aclose(self):
+        """Flush buffered writes and stop the background flusher; the shared client stays open"""
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            # Let a flush that was mid-write finish unwinding before the final one
+            try:
+                await self._flush_task
+            except asyncio.CancelledError:
+                pass
+        await self.flush()
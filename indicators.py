@@ -0,0 +1,170 @@
+import os
+import logging
+import numpy as np
+import pandas as pd
+
+# Keep compiled kernels in a per-user cache so restarts, including read-only
+# installs, load them from disk instead of recompiling; must be set before numba is imported
+os.environ.setdefault('NUMBA_CACHE_DIR', os.path.join(os.path.expanduser('~'), '.cache', 'numba'))
+
+try:
+    from numba import njit
+except ImportError:  # Numba is optional
+    njit = None
+
+def _sma_loop(x, period):
+    """Simple moving average via a running cumulative sum"""
+    n = x.shape[0]
+    out = np.full(n, np.nan)
+    if n < period:
+        return out
+    csum = np.empty(n + 1)
+    csum[0] = 0.0
+    for i in range(n):
+        csum[i + 1] = csum[i] + x[i]
+    out[period - 1:] = (csum[period:] - csum[:-period]) / period
+    return out
+
+def _rsi_loop(x, period):
+    """Wilder RSI: seeded with the mean of the first period moves, then smoothed"""
+    n = x.shape[0]
+    out = np.full(n, np.nan)
+    if n <= period:
+        return out
+
+    avg_gain = 0.0
+    avg_loss = 0.0
+    for i in range(1, period + 1):
+        delta = x[i] - x[i - 1]
+        if delta > 0:
+            avg_gain += delta
+        else:
+            avg_loss -= delta
+    avg_gain /= period
+    avg_loss /= period
+
+    for i in range(period, n):
+        if i > period:
+            delta = x[i] - x[i - 1]
+            gain = delta if delta > 0 else 0.0
+            loss = -delta if delta < 0 else 0.0
+            avg_gain = (avg_gain * (period - 1) + gain) / period
+            avg_loss = (avg_loss * (period - 1) + loss) / period
+        if avg_loss == 0:
+            out[i] = 100.0
+        else:
+            out[i] = 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+    return out
+
+def _sma_numpy(x, period):
+    """Simple moving average via np.cumsum"""
+    out = np.full(x.shape[0], np.nan)
+    if x.shape[0] < period:
+        return out
+    csum = np.concatenate(([0.0], np.cumsum(x)))
+    out[period - 1:] = (csum[period:] - csum[:-period]) / period
+    return out
+
+def _rsi_numpy(x, period):
+    """Wilder RSI using ewm for the smoothing recursion"""
+    out = np.full(x.shape[0], np.nan)
+    if x.shape[0] <= period:
+        return out
+    delta = np.diff(x)
+    gain = np.where(delta > 0, delta, 0.0)
+    loss = np.where(delta < 0, -delta, 0.0)
+
+    # Replacing the first smoothed value with the seed mean makes ewm(adjust=False)
+    # reproduce Wilder's recursion from there on
+    gain = np.concatenate(([gain[:period].mean()], gain[period:]))
+    loss = np.concatenate(([loss[:period].mean()], loss[period:]))
+    avg_gain = pd.Series(gain).ewm(alpha=1 / period, adjust=False).mean().to_numpy()
+    avg_loss = pd.Series(loss).ewm(alpha=1 / period, adjust=False).mean().to_numpy()
+    with np.errstate(divide='ignore', invalid='ignore'):
+        out[period:] = np.where(avg_loss == 0, 100.0, 100.0 - 100.0 / (1.0 + avg_gain / avg_loss))
+    return out
+
+# JIT-compile the loops when Numba is installed, otherwise use the NumPy versions
+sma_cumsum = _sma_numpy
+rsi_wilder = _rsi_numpy
+if njit is not None:
+    try:
+        _sma_jit = njit(cache=True, nogil=True)(_sma_loop)
+        _rsi_jit = njit(cache=True, nogil=True)(_rsi_loop)
+
+        # Pay the compilation cost once at import rather than on the first live bar
+        _sma_jit(np.zeros(100), 20)
+        _rsi_jit(np.zeros(100), 14)
+        sma_cumsum = _sma_jit
+        rsi_wilder = _rsi_jit
+    except Exception as e:
+        logging.warning("Numba compilation failed, using NumPy indicators: %s", e)
+
+class StreamingSMA:
+    """Simple moving average updated in O(1) per bar from a ring buffer and running sum"""
+
+    def __init__(self, period):
+        self.period = period
+        self._buf = [0.0] * period
+        self._idx = 0
+        self._count = 0
+        self._sum = 0.0
+
+    def peek(self, close):
+        """SMA if close were the next bar, without adding it"""
+        if self._count + 1 < self.period:
+            return np.nan
+        return (self._sum + close - self._buf[self._idx]) / self.period
+
+    def update(self, close):
+        """Add a closed bar and return the SMA including it"""
+        value = self.peek(close)
+        self._sum += close - self._buf[self._idx]
+        self._buf[self._idx] = close
+        self._idx = (self._idx + 1) % self.period
+        self._count += 1
+        return value
+
+class StreamingRSI:
+    """Wilder RSI updated in O(1) per bar, seeded the same way as rsi_wilder"""
+
+    def __init__(self, period):
+        self.period = period
+        self.avg_gain = 0.0
+        self.avg_loss = 0.0
+        self.prev_close = None
+        self._moves = 0
+
+    def _step(self, close):
+        """Average gain, average loss and move count after close, without storing them"""
+        if self.prev_close is None:
+            return 0.0, 0.0, 0
+        delta = close - self.prev_close
+        gain = delta if delta > 0 else 0.0
+        loss = -delta if delta < 0 else 0.0
+        moves = self._moves + 1
+        if moves <= self.period:
+            # Seed period: running mean of the first period moves
+            avg_gain = self.avg_gain + (gain - self.avg_gain) / moves
+            avg_loss = self.avg_loss + (loss - self.avg_loss) / moves
+        else:
+            avg_gain = (self.avg_gain * (self.period - 1) + gain) / self.period
+            avg_loss = (self.avg_loss * (self.period - 1) + loss) / self.period
+        return avg_gain, avg_loss, moves
+
+    def _value(self, avg_gain, avg_loss, moves):
+        if moves < self.period:
+            return np.nan
+        if avg_loss == 0:
+            return 100.0
+        return 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+
+    def peek(self, close):
+        """RSI if close were the next bar, without adding it"""
+        return self._value(*self._step(close))
+
+    def update(self, close):
+        """Add a closed bar and return the RSI including it"""
+        self.avg_gain, self.avg_loss, self._moves = self._step(close)
+        self.prev_close = close
+        return self._value(self.avg_gain, self.avg_loss, self._moves)
@@ -1,22 +1,151 @@
-import ccxt
+import asyncio
+import atexit
+import functools
+import importlib
 import pandas as pd
 import numpy as np
+import random
 import time
 import logging
-from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+import queue
+from datetime import datetime, timedelta, timezone
+from typing import NamedTuple
 import config
-from ta.momentum import RSIIndicator
-from ta.trend import SMAIndicator
-import random
-from database import Database
-import threading
+from database import AsyncDatabase, pack_ohlcv
+
+# ccxt loads every exchange module on import, so it is only imported once a bot needs it
+_ccxt = None
+
+def _get_ccxt():
+    """Import ccxt's asyncio API on first use"""
+    global _ccxt
+    if _ccxt is None:
+        _ccxt = importlib.import_module('ccxt.async_support')
+    return _ccxt
+
+@functools.lru_cache(maxsize=None)
+def _exchange_class(name):
+    """ccxt exchange class for an exchange id, resolved once per process"""
+    return getattr(_get_ccxt(), name)
+
+@functools.lru_cache(maxsize=None)
+def _get_exchange(name, api_key, api_secret):
+    """Exchange client shared by every bot using the same exchange and credentials
+
+    Sharing keeps one HTTP session and one rate-limit budget per account
+    instead of one per bot.
+    """
+    return _exchange_class(name)({
+        'apiKey': api_key,
+        'secret': api_secret,
+        'enableRateLimit': True
+    })
+
+@functools.lru_cache(maxsize=None)
+def _timeframe_seconds(timeframe):
+    """Length of a candle timeframe such as '1h' in seconds"""
+    return _get_ccxt().Exchange.parse_timeframe(timeframe)
+
+def _setup_logging():
+    """Send log records through a queue so bots never block on log file I/O"""
+    log_queue = queue.Queue(-1)
+    file_handler = RotatingFileHandler(config.LOG_FILE, maxBytes=10 * 1024 * 1024, backupCount=5)
+    file_handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
+
+    root = logging.getLogger()
+    root.setLevel(config.LOG_LEVEL)
+    root.addHandler(QueueHandler(log_queue))
+
+    # The listener thread does the formatting and writing
+    listener = QueueListener(log_queue, file_handler)
+    listener.start()
+    atexit.register(listener.stop)
 
 # Set up logging
-logging.basicConfig(
-    level=config.LOG_LEVEL,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    filename=config.LOG_FILE
-)
+_setup_logging()
+
+def _ohlcv_frame(ohlcv):
+    """Build an OHLCV DataFrame from ccxt's [timestamp_ms, o, h, l, c, v] rows"""
+    # One float64 conversion up front instead of per-column dtype inference
+    arr = np.asarray(ohlcv, dtype=np.float64).reshape(-1, 6)
+    return pd.DataFrame({
+        'timestamp': pd.to_datetime(arr[:, 0].astype(np.int64), unit='ms'),
+        'open': arr[:, 1],
+        'high': arr[:, 2],
+        'low': arr[:, 3],
+        'close': arr[:, 4],
+        'volume': arr[:, 5]
+    }, copy=False)
+
+# Last fetched OHLCV frame per market, shared by every bot trading it:
+# (exchange, trading_pair, timeframe) -> (candle bucket, df)
+_OHLCV_CACHE = {}
+
+# Retry delay after a failed iteration, doubled per consecutive failure up to the next candle
+RETRY_DELAY = 5  # seconds
+
+# How often live open positions are checked against the last price between candles
+POSITION_CHECK_INTERVAL = 60  # seconds
+
+class Trade(NamedTuple):
+    """An open position; immutable, so one instance can be shared without copying"""
+    entry_price: float
+    stop_loss: float
+    take_profit: float
+    size: float
+    type: str
+    side: int  # +1 long, -1 short
+    timestamp: datetime  # timezone-aware UTC
+
+    def to_dict(self):
+        """Plain dict for the database"""
+        return self._asdict()
+
+class OpenedTrade(NamedTuple):
+    """History event for a trade being opened"""
+    trade: Trade
+    balance: float
+
+    def to_dict(self):
+        """Trade record in the shape stored in the database"""
+        # open is cleared by the database when the matching close record is written
+        return {'type': 'open', 'trade': self.trade.to_dict(), 'balance': self.balance, 'open': True}
+
+class ClosedTrade(NamedTuple):
+    """History event for a trade being closed"""
+    trade: Trade
+    close_price: float
+    pnl: float
+    balance: float
+    reason: str
+
+    def to_dict(self):
+        """Trade record in the shape stored in the database"""
+        return {
+            'type': 'close',
+            'trade': self.trade.to_dict(),
+            'close_price': self.close_price,
+            'pnl': self.pnl,
+            'balance': self.balance,
+            'reason': self.reason
+        }
+
+def _next_midnight_ts():
+    """Unix timestamp of the next local midnight"""
+    tomorrow = datetime.now().date() + timedelta(days=1)
+    return datetime.combine(tomorrow, datetime.min.time()).timestamp()
+
+def _empty_trades():
+    """Column-wise store for open positions; side is +1 for long, -1 for short"""
+    return {
+        'entry': np.empty(0),
+        'sl': np.empty(0),
+        'tp': np.empty(0),
+        'size': np.empty(0),
+        'side': np.empty(0, dtype=np.int8),
+        'ts': np.empty(0, dtype='datetime64[us]')
+    }
 
 class TradingBot:
     def __init__(self, bot_id=None):
@@ -24,30 +153,52 @@ class TradingBot:
         self.bot_id = self.bot_config.get('_id')
         self.exchange = self._initialize_exchange()
         self.balance = self.bot_config['initial_balance']
-        self.open_trades = []
+        self.open_trades = _empty_trades()
         self.daily_loss = 0
         self.max_drawdown = 0
         self.simulation_mode = self.bot_config['simulation_mode']
-        self.db = Database()
+        self.timeframe_seconds = _timeframe_seconds(self.bot_config['timeframe'])
+        self.db = AsyncDatabase()
+
+        # Price multipliers and ratios derived from the config, which does not change at runtime
+        cfg = self.bot_config
+        self._spread_plus = 1 + cfg['simulation_spread'] + cfg['simulation_slippage']
+        self._spread_minus = 1 - cfg['simulation_spread'] - cfg['simulation_slippage']
+        self._sl_long = 1 - cfg['stop_loss']
+        self._sl_short = 1 + cfg['stop_loss']
+        self._tp_long = 1 + cfg['take_profit']
+        self._tp_short = 1 - cfg['take_profit']
+        self._inv_initial_balance = 1.0 / cfg['initial_balance']
+
+        # Daily loss resets once the clock passes this timestamp
+        self._next_daily_reset = _next_midnight_ts()
+
+        # Incremental indicator state, committed up to the last closed bar
+        self._ind_ts = None  # timestamps of the frame indicators were last computed for
+        self._ind_values = None  # (rsi, sma_fast, sma_slow) arrays aligned with _ind_ts
+        self._ind_memo = None  # (key, df) of the last calculate_indicators result
+        self._reset_indicator_state()
+        self._last = {}  # close and indicator values of the latest closed bar
+
+        # Candle period whose market data this bot last recorded
+        self._recorded_bucket = None
         
         if self.simulation_mode:
-            logging.info(f"Starting bot {self.bot_config['name']} in simulation mode")
-            self.simulation_history = []
+            logging.info("Starting bot %s in simulation mode", self.bot_config['name'])
+            self._rng = np.random.default_rng()
 
     def _initialize_exchange(self):
         """Initialize the exchange connection or simulation mode"""
         if self.bot_config['simulation_mode']:
             return None
         
-        exchange_class = getattr(ccxt, self.bot_config['exchange'])
-        exchange = exchange_class({
-            'apiKey': self.bot_config['api_key'],
-            'secret': self.bot_config['api_secret'],
-            'enableRateLimit': True
-        })
-        return exchange
-
-    def get_market_data(self):
+        return _get_exchange(
+            self.bot_config['exchange'],
+            self.bot_config['api_key'],
+            self.bot_config['api_secret']
+        )
+
+    async def get_market_data(self):
         """Fetch OHLCV data from exchange or generate simulated data"""
         try:
             if self.simulation_mode:
@@ -55,312 +206,452 @@ class TradingBot:
                 base_price = 50000  # Base price for simulation
                 volatility = 0.02  # 2% daily volatility
                 
-                # Generate 100 candles
-                timestamps = pd.date_range(end=datetime.now(), periods=100, freq='1H')
-                prices = []
-                current_price = base_price
-                
-                for _ in range(100):
-                    # Random walk with drift
-                    change = random.uniform(-volatility, volatility)
-                    current_price *= (1 + change)
-                    prices.append(current_price)
+                # Generate 100 candles as a vectorized random walk
+                # Naive UTC, like the candles ccxt returns
+                timestamps = pd.date_range(end=datetime.now(timezone.utc).replace(tzinfo=None), periods=100, freq='1H')
+                rng = self._rng
+                prices = base_price * np.cumprod(1.0 + rng.uniform(-volatility, volatility, 100))
                 
                 # Create OHLCV data
                 df = pd.DataFrame({
                     'timestamp': timestamps,
                     'open': prices,
-                    'high': [p * (1 + random.uniform(0, 0.01)) for p in prices],
-                    'low': [p * (1 - random.uniform(0, 0.01)) for p in prices],
-                    'close': [p * (1 + random.uniform(-0.005, 0.005)) for p in prices],
-                    'volume': [random.uniform(100, 1000) for _ in prices]
+                    'high': prices * (1 + rng.uniform(0, 0.01, 100)),
+                    'low': prices * (1 - rng.uniform(0, 0.01, 100)),
+                    'close': prices * (1 + rng.uniform(-0.005, 0.005, 100)),
+                    'volume': rng.uniform(100, 1000, 100)
                 })
             else:
-                ohlcv = self.exchange.fetch_ohlcv(
-                    self.bot_config['trading_pair'],
-                    timeframe=self.bot_config['timeframe'],
-                    limit=100
-                )
-                df = pd.DataFrame(
-                    ohlcv,
-                    columns=['timestamp', 'open', 'high', 'low', 'close', 'volume']
-                )
-                df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
+                timeframe = self.bot_config['timeframe']
+                bucket = int(time.time() // self.timeframe_seconds)
+                key = (self.bot_config['exchange'], self.bot_config['trading_pair'], timeframe)
+                cached = _OHLCV_CACHE.get(key)
+
+                if cached is not None and cached[0] == bucket:
+                    # No candle has closed since this or another bot on the market last fetched
+                    df = cached[1]
+                    if self._recorded_bucket == bucket:
+                        return df
+                elif cached is not None and cached[0] == bucket - 1:
+                    # One candle closed: fetch it and the newly forming one, keep the rest
+                    new = _ohlcv_frame(await self.exchange.fetch_ohlcv(
+                        self.bot_config['trading_pair'],
+                        timeframe=timeframe,
+                        limit=2
+                    ))
+                    old = cached[1]
+                    df = pd.concat(
+                        [old[old['timestamp'] < new['timestamp'].iloc[0]], new],
+                        ignore_index=True
+                    ).iloc[-100:].reset_index(drop=True)
+                else:
+                    df = _ohlcv_frame(await self.exchange.fetch_ohlcv(
+                        self.bot_config['trading_pair'],
+                        timeframe=timeframe,
+                        limit=100
+                    ))
+                _OHLCV_CACHE[key] = (bucket, df)
+                # Every bot records the frame for its own bot_id once per candle, fetched or shared
+                self._recorded_bucket = bucket
             
             # Store market data in database
-            self.db.record_market_data(self.bot_id, {
-                'data': df.to_dict('records'),
+            await self.db.record_market_data(self.bot_id, {
+                **pack_ohlcv(df),
                 'pair': self.bot_config['trading_pair'],
                 'timeframe': self.bot_config['timeframe']
             })
             
             return df
         except Exception as e:
-            logging.error(f"Error fetching market data: {e}")
+            logging.error("Error fetching market data: %s", e)
+            return None
+
+    def _reset_indicator_state(self):
+        """Clear the streaming RSI/SMA state"""
+        import indicators
+        self._rsi_state = indicators.StreamingRSI(self.bot_config['rsi_period'])
+        self._sma_fast_state = indicators.StreamingSMA(self.bot_config['ma_fast'])
+        self._sma_slow_state = indicators.StreamingSMA(self.bot_config['ma_slow'])
+
+    def _advance_indicators(self, close, commit=True):
+        """Indicator values for the next bar in O(1)
+
+        With commit=False the bar is evaluated without being added to the
+        state, which is how the still-forming last candle is handled.
+        """
+        if commit:
+            return (self._rsi_state.update(close),
+                    self._sma_fast_state.update(close),
+                    self._sma_slow_state.update(close))
+        return (self._rsi_state.peek(close),
+                self._sma_fast_state.peek(close),
+                self._sma_slow_state.peek(close))
+
+    def _resume_position(self, ts):
+        """Row of ts holding the previous frame's last bar, or None if ts does not continue it"""
+        if self._ind_ts is None:
+            return None
+        prev_ts = self._ind_ts
+        pos = int(np.searchsorted(ts, prev_ts[-1]))
+        if pos >= len(ts) or ts[pos] != prev_ts[-1]:
+            return None
+        start = len(prev_ts) - 1 - pos
+        if start < 0 or prev_ts[start] != ts[0]:
             return None
+        return pos
 
     def calculate_indicators(self, df):
-        """Calculate technical indicators"""
-        # RSI
-        rsi = RSIIndicator(df['close'], window=self.bot_config['rsi_period'])
-        df['rsi'] = rsi.rsi()
+        """Calculate technical indicators
+
+        Only bars that are new since the previous call are evaluated; a cold
+        start, or a frame that does not continue the previous one, falls back
+        to a full vectorized pass and reseeds the incremental state.
+        """
+        close = df['close'].to_numpy(dtype=np.float64)
+        ts = df['timestamp'].to_numpy()
+
+        # Polling often returns the same candles; reuse the last result then.
+        # The forming bar's close is part of the key since it moves between polls.
+        key = (len(df), ts[-1], close[-1], self.bot_config['rsi_period'],
+               self.bot_config['ma_fast'], self.bot_config['ma_slow'])
+        if self._ind_memo is not None and self._ind_memo[0] == key:
+            return self._ind_memo[1]
+
+        pos = self._resume_position(ts)
+
+        if pos is None:
+            ma_fast = self.bot_config['ma_fast']
+            ma_slow = self.bot_config['ma_slow']
+            import indicators
+            rsi = indicators.rsi_wilder(close, self.bot_config['rsi_period'])
+            sma_fast = indicators.sma_cumsum(close, ma_fast)
+            sma_slow = indicators.sma_cumsum(close, ma_slow)
+
+            # The last candle is still forming, so only commit the closed ones
+            self._reset_indicator_state()
+            for c in close[:-1]:
+                self._advance_indicators(c)
+        else:
+            prev_rsi, prev_fast, prev_slow = self._ind_values
+            start = len(self._ind_ts) - 1 - pos
+            rsi = np.empty(len(close))
+            sma_fast = np.empty(len(close))
+            sma_slow = np.empty(len(close))
+            rsi[:pos] = prev_rsi[start:start + pos]
+            sma_fast[:pos] = prev_fast[start:start + pos]
+            sma_slow[:pos] = prev_slow[start:start + pos]
+            for i in range(pos, len(close)):
+                rsi[i], sma_fast[i], sma_slow[i] = self._advance_indicators(
+                    close[i], commit=i < len(close) - 1
+                )
 
-        # Moving Averages
-        sma_fast = SMAIndicator(df['close'], window=self.bot_config['ma_fast'])
-        sma_slow = SMAIndicator(df['close'], window=self.bot_config['ma_slow'])
-        df['sma_fast'] = sma_fast.sma_indicator()
-        df['sma_slow'] = sma_slow.sma_indicator()
+        self._ind_ts = ts
+        self._ind_values = (rsi, sma_fast, sma_slow)
+        # Signals act on the bar that just closed. A live frame ends with the candle
+        # that opened seconds ago, whose close is still the previous one; simulated
+        # frames are complete. Plain floats, so prices derived from them stay BSON-encodable
+        i = -1 if self.simulation_mode or len(close) < 2 else -2
+        self._last = {
+            'close': float(close[i]),
+            'rsi': float(rsi[i]),
+            'sma_fast': float(sma_fast[i]),
+            'sma_slow': float(sma_slow[i])
+        }
 
-        return df
+        # Assign all indicator columns at once to avoid fragmenting the frame
+        result = df.assign(rsi=rsi, sma_fast=sma_fast, sma_slow=sma_slow)
+        self._ind_memo = (key, result)
+        return result
 
     def check_trading_signals(self, df):
         """Check for trading signals based on technical indicators"""
-        last_row = df.iloc[-1]
+        last = self._last
         
         # Check for buy signal
-        if (last_row['rsi'] < self.bot_config['rsi_oversold'] and 
-            last_row['sma_fast'] > last_row['sma_slow']):
+        if (last['rsi'] < self.bot_config['rsi_oversold'] and 
+            last['sma_fast'] > last['sma_slow']):
             return 'buy'
         
         # Check for sell signal
-        elif (last_row['rsi'] > self.bot_config['rsi_overbought'] and 
-              last_row['sma_fast'] < last_row['sma_slow']):
+        elif (last['rsi'] > self.bot_config['rsi_overbought'] and 
+              last['sma_fast'] < last['sma_slow']):
             return 'sell'
         
         return None
 
-    def execute_trade(self, signal, df):
+    async def execute_trade(self, signal, df):
         """Execute a trade based on the signal"""
-        if len(self.open_trades) >= self.bot_config['max_open_trades']:
+        if self.open_trades['entry'].size >= self.bot_config['max_open_trades']:
             logging.warning("Maximum number of open trades reached")
             return
 
-        last_price = df['close'].iloc[-1]
+        last_price = self._last['close']
         position_size = self.balance * self.bot_config['position_size']
 
         try:
             if self.simulation_mode:
                 # Apply spread and slippage in simulation
                 if signal == 'buy':
-                    entry_price = last_price * (1 + self.bot_config['simulation_spread'] + self.bot_config['simulation_slippage'])
+                    entry_price = last_price * self._spread_plus
+                    stop_loss = entry_price * self._sl_long
+                    take_profit = entry_price * self._tp_long
                 else:  # sell
-                    entry_price = last_price * (1 - self.bot_config['simulation_spread'] - self.bot_config['simulation_slippage'])
-
-                trade = {
-                    'entry_price': entry_price,
-                    'stop_loss': entry_price * (1 - self.bot_config['stop_loss']) if signal == 'buy' else entry_price * (1 + self.bot_config['stop_loss']),
-                    'take_profit': entry_price * (1 + self.bot_config['take_profit']) if signal == 'buy' else entry_price * (1 - self.bot_config['take_profit']),
-                    'size': position_size,
-                    'type': signal,
-                    'timestamp': datetime.now()
-                }
+                    entry_price = last_price * self._spread_minus
+                    stop_loss = entry_price * self._sl_short
+                    take_profit = entry_price * self._tp_short
+
+                trade = Trade(
+                    entry_price=entry_price,
+                    stop_loss=stop_loss,
+                    take_profit=take_profit,
+                    size=position_size,
+                    type=signal,
+                    side=1 if signal == 'buy' else -1,
+                    timestamp=datetime.now(timezone.utc)
+                )
                 
-                self.open_trades.append(trade)
-                self.simulation_history.append({
-                    'type': 'open',
-                    'trade': trade.copy(),
-                    'balance': self.balance
-                })
+                self._add_open_trade(trade)
                 
                 # Record trade in database
-                self.db.record_trade(self.bot_id, {
-                    'type': 'open',
-                    'trade': trade.copy(),
-                    'balance': self.balance
-                })
+                await self.db.record_trade(self.bot_id, OpenedTrade(trade, self.balance).to_dict())
                 
-                logging.info(f"Simulated {signal} order executed at {entry_price}")
+                logging.info("Simulated %s order executed at %s", signal, entry_price)
             else:
                 if signal == 'buy':
-                    order = self.exchange.create_market_buy_order(
+                    order = await self.exchange.create_market_buy_order(
                         self.bot_config['trading_pair'],
                         position_size / last_price
                     )
-                    trade = {
-                        'entry_price': last_price,
-                        'stop_loss': last_price * (1 - self.bot_config['stop_loss']),
-                        'take_profit': last_price * (1 + self.bot_config['take_profit']),
-                        'size': position_size
-                    }
-                    self.open_trades.append(trade)
+                    trade = Trade(
+                        entry_price=last_price,
+                        stop_loss=last_price * self._sl_long,
+                        take_profit=last_price * self._tp_long,
+                        size=position_size,
+                        type='buy',
+                        side=1,
+                        timestamp=datetime.now(timezone.utc)
+                    )
+                    self._add_open_trade(trade)
                     
                     # Record trade in database
-                    self.db.record_trade(self.bot_id, {
-                        'type': 'open',
-                        'trade': trade.copy(),
-                        'balance': self.balance
-                    })
+                    await self.db.record_trade(self.bot_id, OpenedTrade(trade, self.balance).to_dict())
                     
-                    logging.info(f"Buy order executed at {last_price}")
+                    logging.info("Buy order executed at %s", last_price)
 
                 elif signal == 'sell':
-                    order = self.exchange.create_market_sell_order(
+                    order = await self.exchange.create_market_sell_order(
                         self.bot_config['trading_pair'],
                         position_size / last_price
                     )
-                    trade = {
-                        'entry_price': last_price,
-                        'stop_loss': last_price * (1 + self.bot_config['stop_loss']),
-                        'take_profit': last_price * (1 - self.bot_config['take_profit']),
-                        'size': position_size
-                    }
-                    self.open_trades.append(trade)
+                    trade = Trade(
+                        entry_price=last_price,
+                        stop_loss=last_price * self._sl_short,
+                        take_profit=last_price * self._tp_short,
+                        size=position_size,
+                        type='sell',
+                        side=-1,
+                        timestamp=datetime.now(timezone.utc)
+                    )
+                    self._add_open_trade(trade)
                     
                     # Record trade in database
-                    self.db.record_trade(self.bot_id, {
-                        'type': 'open',
-                        'trade': trade.copy(),
-                        'balance': self.balance
-                    })
+                    await self.db.record_trade(self.bot_id, OpenedTrade(trade, self.balance).to_dict())
                     
-                    logging.info(f"Sell order executed at {last_price}")
+                    logging.info("Sell order executed at %s", last_price)
 
         except Exception as e:
-            logging.error(f"Error executing trade: {e}")
-
-    def check_open_trades(self, current_price):
+            logging.error("Error executing trade: %s", e)
+
+    def _add_open_trade(self, trade):
+        """Append a trade to the open-trade columns"""
+        t = self.open_trades
+        t['entry'] = np.append(t['entry'], trade.entry_price)
+        t['sl'] = np.append(t['sl'], trade.stop_loss)
+        t['tp'] = np.append(t['tp'], trade.take_profit)
+        t['size'] = np.append(t['size'], trade.size)
+        t['side'] = np.append(t['side'], np.int8(trade.side))
+        # The column holds naive UTC; numpy has no time zone support
+        t['ts'] = np.append(t['ts'], np.datetime64(trade.timestamp.replace(tzinfo=None), 'us'))
+
+    def _trade_at(self, i):
+        """Open trade i as a Trade"""
+        t = self.open_trades
+        side = int(t['side'][i])
+        return Trade(
+            entry_price=float(t['entry'][i]),
+            stop_loss=float(t['sl'][i]),
+            take_profit=float(t['tp'][i]),
+            size=float(t['size'][i]),
+            type='buy' if side > 0 else 'sell',
+            side=side,
+            timestamp=t['ts'][i].astype(datetime).replace(tzinfo=timezone.utc)
+        )
+
+    async def check_open_trades(self, current_price):
         """Check and manage open trades"""
-        for trade in self.open_trades[:]:
-            if self.simulation_mode:
-                if trade['type'] == 'buy':  # Long position
-                    if current_price <= trade['stop_loss']:
-                        self.close_trade(trade, current_price, 'stop_loss')
-                    elif current_price >= trade['take_profit']:
-                        self.close_trade(trade, current_price, 'take_profit')
-                else:  # Short position
-                    if current_price >= trade['stop_loss']:
-                        self.close_trade(trade, current_price, 'stop_loss')
-                    elif current_price <= trade['take_profit']:
-                        self.close_trade(trade, current_price, 'take_profit')
-            else:
-                if trade['entry_price'] > current_price:  # Long position
-                    if current_price <= trade['stop_loss']:
-                        self.close_trade(trade, current_price, 'stop_loss')
-                    elif current_price >= trade['take_profit']:
-                        self.close_trade(trade, current_price, 'take_profit')
-                else:  # Short position
-                    if current_price >= trade['stop_loss']:
-                        self.close_trade(trade, current_price, 'stop_loss')
-                    elif current_price <= trade['take_profit']:
-                        self.close_trade(trade, current_price, 'take_profit')
-
-    def close_trade(self, trade, current_price, reason):
-        """Close a trade and update balance"""
+        t = self.open_trades
+        if not t['entry'].size:
+            return
+
+        # Multiplying by side turns the long and short checks into the same comparison
+        hit_sl = t['side'] * (current_price - t['sl']) <= 0
+        hit_tp = t['side'] * (t['tp'] - current_price) <= 0
+        closed = hit_sl | hit_tp
+        if not closed.any():
+            return
+
+        reasons = np.where(hit_sl[closed], 'stop_loss', 'take_profit')
+        await self.close_trades_batch(closed, current_price, reasons)
+
+    async def close_trades_batch(self, mask, current_price, reason):
+        """Close the open trades selected by mask and update balance
+
+        reason is either one string for all of them or one per closed trade.
+        """
         try:
-            if self.simulation_mode:
-                if trade['type'] == 'buy':  # Long position
-                    pnl = (current_price - trade['entry_price']) * trade['size'] / trade['entry_price']
-                else:  # Short position
-                    pnl = (trade['entry_price'] - current_price) * trade['size'] / trade['entry_price']
+            t = self.open_trades
+            idx = np.flatnonzero(mask)
+            if not idx.size:
+                return
+
+            entry = t['entry'][idx]
+            # side is +1 for longs and -1 for shorts, so one expression covers every trade
+            pnl = t['side'][idx] * (current_price - entry) * t['size'][idx] / entry
+            balances = self.balance + np.cumsum(pnl)
+            if isinstance(reason, str):
+                reason = [reason] * idx.size
+            trades = [self._trade_at(i) for i in idx]
+
+            self.balance = float(balances[-1])
+            keep = np.ones(t['entry'].size, dtype=bool)
+            keep[idx] = False
+            for key in t:
+                t[key] = t[key][keep]
+
+            label = 'Simulated trade' if self.simulation_mode else 'Trade'
+            for trade, trade_pnl, balance, trade_reason in zip(trades, pnl.tolist(), balances.tolist(), reason):
+                closed = ClosedTrade(trade, current_price, trade_pnl, balance, str(trade_reason))
 
-                self.balance += pnl
-                self.open_trades.remove(trade)
-                
-                # Record trade history
-                trade_history = {
-                    'type': 'close',
-                    'trade': trade.copy(),
-                    'close_price': current_price,
-                    'pnl': pnl,
-                    'balance': self.balance,
-                    'reason': reason
-                }
-                self.simulation_history.append(trade_history)
-                
                 # Record trade in database
-                self.db.record_trade(self.bot_id, trade_history)
-                
-                logging.info(f"Simulated trade closed: {reason}, PnL: {pnl:.2f}")
-            else:
-                if trade['entry_price'] > current_price:  # Long position
-                    pnl = (current_price - trade['entry_price']) * trade['size'] / trade['entry_price']
-                else:  # Short position
-                    pnl = (trade['entry_price'] - current_price) * trade['size'] / trade['entry_price']
+                await self.db.record_trade(self.bot_id, closed.to_dict())
 
-                self.balance += pnl
-                self.open_trades.remove(trade)
-                
-                # Record trade in database
-                self.db.record_trade(self.bot_id, {
-                    'type': 'close',
-                    'trade': trade.copy(),
-                    'close_price': current_price,
-                    'pnl': pnl,
-                    'balance': self.balance,
-                    'reason': reason
-                })
-                
-                logging.info(f"Trade closed: {reason}, PnL: {pnl:.2f}")
+                logging.info("%s closed: %s, PnL: %.2f", label, trade_reason, trade_pnl)
 
         except Exception as e:
-            logging.error(f"Error closing trade: {e}")
+            logging.error("Error closing trade: %s", e)
+
+    async def close_trade(self, index, current_price, reason):
+        """Close open trade index and update balance"""
+        mask = np.zeros(self.open_trades['entry'].size, dtype=bool)
+        mask[index] = True
+        await self.close_trades_batch(mask, current_price, reason)
+
+    def _next_wait(self, failures=0):
+        """Seconds to wait before the next iteration
+
+        Normally this is until just after the current candle closes, plus a
+        little jitter so bots sharing a market do not all fetch at once.
+        After consecutive failures the retry comes sooner, backing off
+        exponentially up to that candle close.
+        """
+        now = time.time()
+        next_close = (now // self.timeframe_seconds + 1) * self.timeframe_seconds
+        wait = next_close - now + random.uniform(1, 3)
+        if failures:
+            wait = min(wait, RETRY_DELAY * 2 ** (failures - 1))
+        return wait
+
+    async def _wait(self, seconds):
+        """Sleep until the next iteration, guarding live open positions meanwhile
+
+        Indicators and signals only change once per candle, but stop losses
+        and take profits are checked against the exchange's last price every
+        POSITION_CHECK_INTERVAL while live positions are open. Simulated
+        prices only exist per candle, so simulated positions are checked then.
+        """
+        deadline = time.time() + seconds
+        while True:
+            remaining = deadline - time.time()
+            if self.simulation_mode or not self.open_trades['entry'].size or remaining <= POSITION_CHECK_INTERVAL:
+                await asyncio.sleep(max(remaining, 0))
+                return
+            await asyncio.sleep(POSITION_CHECK_INTERVAL)
+            try:
+                ticker = await self.exchange.fetch_ticker(self.bot_config['trading_pair'])
+                await self.check_open_trades(ticker['last'])
+            except Exception as e:
+                logging.error("Error checking open trades: %s", e)
 
-    def run(self):
+    async def run(self):
         """Main trading loop"""
-        logging.info(f"Starting trading bot: {self.bot_config['name']}")
+        logging.info("Starting trading bot: %s", self.bot_config['name'])
         if self.simulation_mode:
             logging.info("Running in simulation mode")
         
-        while True:
-            try:
-                # Get market data
-                df = self.get_market_data()
-                if df is None:
-                    time.sleep(60)
-                    continue
-
-                # Calculate indicators
-                df = self.calculate_indicators(df)
-
-                # Check for trading signals
-                signal = self.check_trading_signals(df)
-                if signal:
-                    self.execute_trade(signal, df)
-
-                # Check open trades
-                current_price = df['close'].iloc[-1]
-                self.check_open_trades(current_price)
-
-                # Update daily loss and drawdown
-                self.update_risk_metrics()
-
-                # Record performance metrics
-                self.db.record_performance(self.bot_id, {
-                    'balance': self.balance,
-                    'daily_loss': self.daily_loss,
-                    'max_drawdown': self.max_drawdown,
-                    'open_trades': len(self.open_trades)
-                })
-
-                # Sleep for a while before next iteration
-                time.sleep(60)
-
-            except Exception as e:
-                logging.error(f"Error in main loop: {e}")
-                time.sleep(60)
+        failures = 0
+        try:
+            while True:
+                try:
+                    # Get market data
+                    df = await self.get_market_data()
+                    if df is None:
+                        failures += 1
+                    else:
+                        # Calculate indicators in a worker thread so other bots keep running
+                        df = await asyncio.get_running_loop().run_in_executor(
+                            None, self.calculate_indicators, df
+                        )
+
+                        # Check for trading signals
+                        signal = self.check_trading_signals(df)
+                        if signal:
+                            await self.execute_trade(signal, df)
+
+                        # Check open trades
+                        current_price = self._last['close']
+                        await self.check_open_trades(current_price)
+
+                        # Update daily loss and drawdown; past the limits only this bot stops
+                        if self.update_risk_metrics():
+                            break
+
+                        # Record performance metrics
+                        await self.db.record_performance(self.bot_id, {
+                            'balance': self.balance,
+                            'daily_loss': self.daily_loss,
+                            'max_drawdown': self.max_drawdown,
+                            'open_trades': int(self.open_trades['entry'].size)
+                        })
+                        failures = 0
+
+                except Exception as e:
+                    logging.error("Error in main loop: %s", e)
+                    failures += 1
+
+                # Wait for the next candle close, or a sooner retry after failures
+                await self._wait(self._next_wait(failures))
+        finally:
+            # Persist anything still buffered before the bot stops
+            await self.db.aclose()
 
     def update_risk_metrics(self):
-        """Update risk management metrics"""
-        # Reset daily loss at midnight
-        if datetime.now().hour == 0 and datetime.now().minute == 0:
+        """Update risk management metrics and return True once a risk limit is exceeded"""
+        # Reset daily loss once per day, however the loop's wake-ups line up with midnight
+        if time.time() >= self._next_daily_reset:
             self.daily_loss = 0
+            self._next_daily_reset = _next_midnight_ts()
 
         # Calculate current drawdown
-        current_drawdown = (self.bot_config['initial_balance'] - self.balance) / self.bot_config['initial_balance']
-        self.max_drawdown = max(self.max_drawdown, current_drawdown)
+        self.max_drawdown = max(self.max_drawdown, 1.0 - self.balance * self._inv_initial_balance)
 
         # Check if we should stop trading
         if (self.daily_loss >= self.bot_config['max_daily_loss'] or 
             self.max_drawdown >= self.bot_config['max_drawdown']):
-            logging.error("Risk limits exceeded. Stopping trading bot.")
-            self.db.close()
-            exit(1)
+            logging.error("Risk limits exceeded. Stopping trading bot: %s", self.bot_config['name'])
+            return True
+        return False
 
-    def __del__(self):
-        """Cleanup when bot is destroyed"""
-        self.db.close()
-
-if __name__ == "__main__":
+async def main():
     # Example bot configurations
     bot_configs = [
         {
@@ -375,17 +666,21 @@ if __name__ == "__main__":
         }
     ]
 
-    # Start all bots
+    # Start all bots on a single event loop
+    bots = []
     for bot_config in bot_configs:
         saved_config = config.save_bot_config(bot_config)
-        bot = TradingBot(saved_config['_id'])
-        thread = threading.Thread(target=bot.run)
-        thread.daemon = True
-        thread.start()
+        bots.append(TradingBot(saved_config['_id']))
 
-    # Keep main thread alive
     try:
-        while True:
-            time.sleep(1)
+        await asyncio.gather(*(bot.run() for bot in bots))
+    finally:
+        # Async exchange clients hold HTTP sessions that must be closed on the loop
+        exchanges = {id(bot.exchange): bot.exchange for bot in bots if bot.exchange is not None}
+        await asyncio.gather(*(exchange.close() for exchange in exchanges.values()))
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
     except KeyboardInterrupt:
         print("Stopping all bots...") 
\ No newline at end of file
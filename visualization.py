@@ -1,45 +1,206 @@
 import dash
-from dash import html, dcc
+from dash import html, dcc, dash_table, Patch, no_update
 import dash_bootstrap_components as dbc
 import plotly.graph_objects as go
-from dash.dependencies import Input, Output
-import pandas as pd
-import config
-from main import TradingBot
-import threading
+from dash.dependencies import Input, Output, State
+from dash.exceptions import PreventUpdate
+import numpy as np
 import time
-from datetime import datetime
+import config
+import indicators
+from database import Database
 
 # Initialize the Dash app
 app = dash.Dash(__name__, external_stylesheets=[dbc.themes.DARKLY])
 
-# Create a global variable to store the latest data
-latest_data = None
-latest_trades = []
-simulation_history = []
-
-def update_data():
-    """Background thread to update data from the trading bot"""
-    bot = TradingBot()
-    while True:
-        try:
-            df = bot.get_market_data()
-            if df is not None:
-                df = bot.calculate_indicators(df)
-                global latest_data
-                latest_data = df
-                global latest_trades
-                latest_trades = bot.open_trades
-                if config.SIMULATION_MODE:
-                    global simulation_history
-                    simulation_history = bot.simulation_history
-        except Exception as e:
-            print(f"Error updating data: {e}")
-        time.sleep(60)  # Update every minute
-
-# Start the data update thread
-update_thread = threading.Thread(target=update_data, daemon=True)
-update_thread.start()
+UPDATE_INTERVAL = 60  # seconds
+
+# The dashboard reads what the running bots store rather than running a bot of its own
+_db = None
+_snapshot = None  # (interval bucket, snapshot), shared by every viewer
+_rendered = (None, {})  # (snapshot key, {tab state: outputs}), shared by every viewer
+
+def _get_db():
+    """Connect to the database on first use, so importing the dashboard does no server I/O"""
+    global _db
+    if _db is None:
+        _db = Database()
+    return _db
+
+def _dashboard_bot():
+    """Config of the bot to display: the newest bot named config.DASHBOARD_BOT, else the newest stored bot"""
+    bot = _get_db().get_latest_bot(config.DASHBOARD_BOT)
+    return {**config.DEFAULT_BOT_CONFIG, **bot} if bot else None
+
+def _load_snapshot():
+    """Latest candles with indicators, trades and balance, queried at most once per interval"""
+    global _snapshot
+    bucket = int(time.time() // UPDATE_INTERVAL)
+    if _snapshot is not None and _snapshot[0] == bucket:
+        return _snapshot[1]
+
+    # Resolved with every snapshot, so a running dashboard follows the bots across restarts
+    bot = _dashboard_bot()
+    if bot is None:
+        return None
+    db = _get_db()
+    df = db.get_latest_market_data(bot['_id'])
+    if df is None:
+        return None
+
+    close = df['close'].to_numpy()
+    df = df.assign(
+        rsi=indicators.rsi_wilder(close, bot['rsi_period']),
+        sma_fast=indicators.sma_cumsum(close, bot['ma_fast']),
+        sma_slow=indicators.sma_cumsum(close, bot['ma_slow'])
+    )
+    # Oldest first, the order the history table and markers are drawn in
+    history = db.get_bot_trades(bot['_id'])[::-1]
+    performance = db.get_bot_performance(bot['_id'], limit=1)
+    snapshot = {
+        'bot': bot,
+        'data': df,
+        'history': history,
+        'open_trades': db.get_open_trades(bot['_id']),
+        'balance': performance[0]['balance'] if performance else bot['initial_balance']
+    }
+    _snapshot = (bucket, snapshot)
+    return snapshot
+
+# Columns plotted from the candle frame: (trace index, {trace key: frame column})
+_PRICE_SERIES = [
+    (0, {'x': 'timestamp', 'open': 'open', 'high': 'high', 'low': 'low', 'close': 'close'}),
+    (1, {'x': 'timestamp', 'y': 'sma_fast'}),
+    (2, {'x': 'timestamp', 'y': 'sma_slow'})
+]
+_RSI_SERIES = [(0, {'x': 'timestamp', 'y': 'rsi'})]
+
+# Trade markers live in three fixed traces so new trades extend them instead of adding traces
+_BUY_TRACE, _SELL_TRACE, _CLOSE_TRACE = 3, 4, 5
+
+_TABLE_STYLE = dict(
+    style_header={'backgroundColor': '#303030', 'color': 'white', 'fontWeight': 'bold'},
+    style_cell={'backgroundColor': '#222222', 'color': 'white', 'border': '1px solid #444444'}
+)
+
+def _columns(rows, columns):
+    """JSON-ready lists for the given frame columns"""
+    return {key: rows[column].tolist() for key, column in columns.items()}
+
+def _markers(records):
+    """Marker coordinates for trade records, grouped by the trace they belong in"""
+    points = {
+        _BUY_TRACE: {'x': [], 'y': []},
+        _SELL_TRACE: {'x': [], 'y': []},
+        _CLOSE_TRACE: {'x': [], 'y': [], 'text': []}
+    }
+    colors = []
+    for record in records:
+        trade = record['trade']
+        if record['type'] == 'open':
+            target = points[_BUY_TRACE if trade['type'] == 'buy' else _SELL_TRACE]
+            target['x'].append(trade['timestamp'])
+            target['y'].append(trade['entry_price'])
+        elif record['type'] == 'close':
+            target = points[_CLOSE_TRACE]
+            target['x'].append(trade['timestamp'])
+            target['y'].append(record['close_price'])
+            target['text'].append(record['reason'])
+            colors.append('red' if record['pnl'] < 0 else 'green')
+    return points, colors
+
+def _open_trade_rows(trades):
+    """Rows for the open trades table"""
+    return [{
+        'type': trade['type'],
+        'entry_price': f"{trade['entry_price']:.2f}",
+        'stop_loss': f"{trade['stop_loss']:.2f}",
+        'take_profit': f"{trade['take_profit']:.2f}",
+        'size': f"{trade['size']:.2f}"
+    } for trade in trades]
+
+def _history_rows(history):
+    """Rows for the trade history table"""
+    return [{
+        'time': record['trade']['timestamp'].strftime('%Y-%m-%d %H:%M:%S'),
+        'type': record['trade']['type'].capitalize(),
+        'entry_price': f"{record['trade']['entry_price']:.2f}",
+        'exit_price': f"{record.get('close_price', 'N/A')}",
+        'pnl': f"{record.get('pnl', 'N/A')}",
+        'balance': f"{record['balance']:.2f}"
+    } for record in history]
+
+def _build_figures(snapshot):
+    """Full price and RSI figures for a snapshot"""
+    bot = snapshot['bot']
+    latest_data = snapshot['data']
+
+    # Create price chart with candlesticks
+    candles = _columns(latest_data, _PRICE_SERIES[0][1])
+    fast = _columns(latest_data, _PRICE_SERIES[1][1])
+    slow = _columns(latest_data, _PRICE_SERIES[2][1])
+    points, colors = _markers(snapshot['history'])
+    price_fig = go.Figure(data=[
+        go.Candlestick(name='Price', **candles),
+        go.Scatter(name='Fast MA', line=dict(color='blue'), **fast),
+        go.Scatter(name='Slow MA', line=dict(color='orange'), **slow),
+        go.Scatter(name='Buy Entry', mode='markers',
+                   marker=dict(symbol='triangle-up', size=10, color='green'),
+                   **points[_BUY_TRACE]),
+        go.Scatter(name='Sell Entry', mode='markers',
+                   marker=dict(symbol='triangle-down', size=10, color='red'),
+                   **points[_SELL_TRACE]),
+        go.Scatter(name='Close', mode='markers',
+                   marker=dict(symbol='x', size=10, color=colors),
+                   **points[_CLOSE_TRACE])
+    ])
+    price_fig.update_layout(
+        title='Price Chart',
+        yaxis_title='Price',
+        template='plotly_dark',
+        height=600
+    )
+
+    # Create RSI chart
+    rsi_fig = go.Figure(data=[
+        go.Scatter(name='RSI', line=dict(color='purple'), **_columns(latest_data, _RSI_SERIES[0][1]))
+    ])
+    rsi_fig.add_hline(y=bot['rsi_overbought'], line=dict(color='red', dash='dash'),
+                      annotation_text='Overbought')
+    rsi_fig.add_hline(y=bot['rsi_oversold'], line=dict(color='green', dash='dash'),
+                      annotation_text='Oversold')
+    rsi_fig.update_layout(
+        title='RSI Indicator',
+        yaxis_title='RSI',
+        template='plotly_dark',
+        height=300
+    )
+    return price_fig, rsi_fig
+
+def _patch_figures(snapshot, start, replace_at, new_trades):
+    """Patches that redraw the last plotted candle and append the ones after it
+
+    start is the row of the last plotted candle in the snapshot frame and
+    replace_at its index in the browser's traces.
+    """
+    rows = snapshot['data'].iloc[start:]
+    price_patch = Patch()
+    rsi_patch = Patch()
+    for patch, series in ((price_patch, _PRICE_SERIES), (rsi_patch, _RSI_SERIES)):
+        for trace, columns in series:
+            # The last plotted candle was still forming, so it is replaced rather than kept
+            for key, values in _columns(rows, columns).items():
+                del patch['data'][trace][key][replace_at]
+                patch['data'][trace][key].extend(values)
+
+    points, colors = _markers(new_trades)
+    for trace, values in points.items():
+        for key, items in values.items():
+            if items:
+                price_patch['data'][trace][key].extend(items)
+    if colors:
+        price_patch['data'][_CLOSE_TRACE]['marker']['color'].extend(colors)
+    return price_patch, rsi_patch
 
 # Define the layout
 app.layout = dbc.Container([
@@ -47,178 +208,129 @@ app.layout = dbc.Container([
         dbc.Col([
             html.H1("Trading Bot Dashboard", className="text-center my-4"),
             html.Div([
-                html.H3("Simulation Mode" if config.SIMULATION_MODE else "Live Trading", 
-                       className="text-center mb-4"),
-                html.H4(f"Current Balance: ${config.INITIAL_BALANCE:.2f}", 
-                       className="text-center mb-4")
+                html.H3(id='mode-header', className="text-center mb-4"),
+                html.H4(id='balance-header', className="text-center mb-4")
             ]),
             dcc.Graph(id='price-chart'),
             dcc.Graph(id='rsi-chart'),
             dcc.Interval(
                 id='interval-component',
-                interval=60*1000,  # Update every minute
+                interval=UPDATE_INTERVAL*1000,  # Update every minute
                 n_intervals=0
-            )
+            ),
+            # What this browser tab has drawn, so later updates only send what is new
+            dcc.Store(id='plotted')
         ])
     ]),
     dbc.Row([
         dbc.Col([
             html.H3("Open Trades", className="text-center my-4"),
-            html.Div(id='trades-table')
+            dash_table.DataTable(
+                id='trades-table',
+                columns=[
+                    {'name': 'Type', 'id': 'type'},
+                    {'name': 'Entry Price', 'id': 'entry_price'},
+                    {'name': 'Stop Loss', 'id': 'stop_loss'},
+                    {'name': 'Take Profit', 'id': 'take_profit'},
+                    {'name': 'Size', 'id': 'size'}
+                ],
+                data=[],
+                **_TABLE_STYLE
+            )
         ])
     ]),
     dbc.Row([
         dbc.Col([
             html.H3("Trade History", className="text-center my-4"),
-            html.Div(id='trade-history')
+            dash_table.DataTable(
+                id='trade-history',
+                columns=[
+                    {'name': 'Time (UTC)', 'id': 'time'},
+                    {'name': 'Type', 'id': 'type'},
+                    {'name': 'Entry Price', 'id': 'entry_price'},
+                    {'name': 'Exit Price', 'id': 'exit_price'},
+                    {'name': 'PnL', 'id': 'pnl'},
+                    {'name': 'Balance', 'id': 'balance'}
+                ],
+                data=[],
+                # Only the visible rows are rendered, however long the history gets
+                virtualization=True,
+                fixed_rows={'headers': True},
+                page_action='none',
+                style_table={'height': '400px', 'overflowY': 'auto'},
+                **_TABLE_STYLE
+            )
         ])
-    ]) if config.SIMULATION_MODE else None
+    ])
 ], fluid=True)
 
 @app.callback(
     [Output('price-chart', 'figure'),
      Output('rsi-chart', 'figure'),
-     Output('trades-table', 'children'),
-     Output('trade-history', 'children')],
-    [Input('interval-component', 'n_intervals')]
+     Output('trades-table', 'data'),
+     Output('trade-history', 'data'),
+     Output('mode-header', 'children'),
+     Output('balance-header', 'children'),
+     Output('plotted', 'data')],
+    [Input('interval-component', 'n_intervals')],
+    [State('plotted', 'data')]
 )
-def update_charts(n):
-    if latest_data is None:
-        return {}, {}, "No data available", "No trade history available"
-    
-    # Create price chart with candlesticks
-    price_fig = go.Figure(data=[
-        go.Candlestick(
-            x=latest_data['timestamp'],
-            open=latest_data['open'],
-            high=latest_data['high'],
-            low=latest_data['low'],
-            close=latest_data['close'],
-            name='Price'
-        ),
-        go.Scatter(
-            x=latest_data['timestamp'],
-            y=latest_data['sma_fast'],
-            name='Fast MA',
-            line=dict(color='blue')
-        ),
-        go.Scatter(
-            x=latest_data['timestamp'],
-            y=latest_data['sma_slow'],
-            name='Slow MA',
-            line=dict(color='orange')
-        )
-    ])
-    
-    # Add trade markers for simulation mode
-    if config.SIMULATION_MODE and simulation_history:
-        for trade in simulation_history:
-            if trade['type'] == 'open':
-                price_fig.add_trace(go.Scatter(
-                    x=[trade['trade']['timestamp']],
-                    y=[trade['trade']['entry_price']],
-                    mode='markers',
-                    marker=dict(
-                        symbol='triangle-up' if trade['trade']['type'] == 'buy' else 'triangle-down',
-                        size=10,
-                        color='green' if trade['trade']['type'] == 'buy' else 'red'
-                    ),
-                    name=f"{trade['trade']['type'].capitalize()} Entry"
-                ))
-            elif trade['type'] == 'close':
-                price_fig.add_trace(go.Scatter(
-                    x=[trade['trade']['timestamp']],
-                    y=[trade['close_price']],
-                    mode='markers',
-                    marker=dict(
-                        symbol='x',
-                        size=10,
-                        color='red' if trade['pnl'] < 0 else 'green'
-                    ),
-                    name=f"Close ({trade['reason']})"
-                ))
-    
-    price_fig.update_layout(
-        title='Price Chart',
-        yaxis_title='Price',
-        template='plotly_dark',
-        height=600
-    )
+def update_charts(n, plotted):
+    snapshot = _load_snapshot()
+    if snapshot is None:
+        return {}, {}, [], [], "No data available", "", None
 
-    # Create RSI chart
-    rsi_fig = go.Figure(data=[
-        go.Scatter(
-            x=latest_data['timestamp'],
-            y=latest_data['rsi'],
-            name='RSI',
-            line=dict(color='purple')
-        ),
-        go.Scatter(
-            x=latest_data['timestamp'],
-            y=[config.RSI_OVERBOUGHT] * len(latest_data),
-            name='Overbought',
-            line=dict(color='red', dash='dash')
-        ),
-        go.Scatter(
-            x=latest_data['timestamp'],
-            y=[config.RSI_OVERSOLD] * len(latest_data),
-            name='Oversold',
-            line=dict(color='green', dash='dash')
-        )
-    ])
-    
-    rsi_fig.update_layout(
-        title='RSI Indicator',
-        yaxis_title='RSI',
-        template='plotly_dark',
-        height=300
-    )
+    latest_data = snapshot['data']
+    history = snapshot['history']
+    timestamps = latest_data['timestamp'].to_numpy(dtype='datetime64[ms]').view(np.int64).tolist()
+    drawn = {
+        'ts': timestamps[-1],
+        'close': float(latest_data['close'].iloc[-1]),
+        'trade': str(history[-1]['_id']) if history else None
+    }
+    trade_ids = [str(record['_id']) for record in history]
 
-    # Create trades table
-    trades_table = dbc.Table([
-        html.Thead(html.Tr([
-            html.Th("Type"),
-            html.Th("Entry Price"),
-            html.Th("Stop Loss"),
-            html.Th("Take Profit"),
-            html.Th("Size")
-        ])),
-        html.Tbody([
-            html.Tr([
-                html.Td(trade['type'] if config.SIMULATION_MODE else ('Long' if trade['entry_price'] > latest_data['close'].iloc[-1] else 'Short')),
-                html.Td(f"{trade['entry_price']:.2f}"),
-                html.Td(f"{trade['stop_loss']:.2f}"),
-                html.Td(f"{trade['take_profit']:.2f}"),
-                html.Td(f"{trade['size']:.2f}")
-            ]) for trade in latest_trades
-        ])
-    ], bordered=True, dark=True, hover=True)
-
-    # Create trade history table for simulation mode
-    trade_history = None
-    if config.SIMULATION_MODE and simulation_history:
-        trade_history = dbc.Table([
-            html.Thead(html.Tr([
-                html.Th("Time"),
-                html.Th("Type"),
-                html.Th("Entry Price"),
-                html.Th("Exit Price"),
-                html.Th("PnL"),
-                html.Th("Balance")
-            ])),
-            html.Tbody([
-                html.Tr([
-                    html.Td(trade['trade']['timestamp'].strftime('%Y-%m-%d %H:%M:%S')),
-                    html.Td(trade['trade']['type'].capitalize()),
-                    html.Td(f"{trade['trade']['entry_price']:.2f}"),
-                    html.Td(f"{trade.get('close_price', 'N/A')}"),
-                    html.Td(f"{trade.get('pnl', 'N/A')}"),
-                    html.Td(f"{trade['balance']:.2f}")
-                ]) for trade in simulation_history
-            ])
-        ], bordered=True, dark=True, hover=True)
-
-    return price_fig, rsi_fig, trades_table, trade_history
+    # Nothing new since this tab last drew
+    if plotted is not None and (plotted['ts'], plotted['close'], plotted['trade']) == (
+            drawn['ts'], drawn['close'], drawn['trade']):
+        raise PreventUpdate
+
+    # Anything this tab has not drawn, or cannot line up with, gets full figures
+    full = (plotted is None or plotted['ts'] not in timestamps
+            or (plotted['trade'] is not None and plotted['trade'] not in trade_ids))
+    state = None if full else (plotted['ts'], plotted['points'], plotted['trade'])
+
+    # Tabs in the same state get the same outputs, so each is rendered once per snapshot
+    global _rendered
+    key = (str(snapshot['bot']['_id']), drawn['ts'], drawn['close'], drawn['trade'])
+    if _rendered[0] != key:
+        _rendered = (key, {})
+    outputs = _rendered[1].get(state)
+    if outputs is None:
+        if full:
+            price_fig, rsi_fig = _build_figures(snapshot)
+            trades_data = _open_trade_rows(snapshot['open_trades'])
+            history_data = _history_rows(history)
+            points = len(timestamps)
+        else:
+            start = timestamps.index(plotted['ts'])
+            new_trades = history[trade_ids.index(plotted['trade']) + 1:] if plotted['trade'] else history
+            price_fig, rsi_fig = _patch_figures(snapshot, start, plotted['points'] - 1, new_trades)
+            points = plotted['points'] + len(timestamps) - start - 1
+
+            # Tables only change along with the trades
+            if new_trades:
+                trades_data = _open_trade_rows(snapshot['open_trades'])
+                history_data = _history_rows(history)
+            else:
+                trades_data = history_data = no_update
+        outputs = (price_fig, rsi_fig, trades_data, history_data, points)
+        _rendered[1][state] = outputs
+    price_fig, rsi_fig, trades_data, history_data, drawn['points'] = outputs
+
+    mode = "Simulation Mode" if snapshot['bot']['simulation_mode'] else "Live Trading"
+    balance = f"Current Balance: ${snapshot['balance']:.2f}"
+    return price_fig, rsi_fig, trades_data, history_data, mode, balance, drawn
 
 if __name__ == '__main__':
-    app.run_server(debug=True, port=8050) 
\ No newline at end of file
+    app.run_server(debug=True, port=8050)